@@ -5,12 +5,27 @@ Sentinel Asia緊急観測要請（EOR）APIの純粋MCPサーバー（Render確
 """
 
 import asyncio
+import cProfile
+import hmac
 import json
 import httpx
+import math
 import os
+import random
+import re
+import sys
+import time
 import uvicorn
-from typing import Dict, List, Optional, Any, Union
-from fastapi import FastAPI, Request
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from contextlib import contextmanager
+from contextvars import Context, ContextVar
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import compress
+from typing import Dict, List, Optional, Any, Tuple, Union
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from sse_starlette.sse import EventSourceResponse
 from pydantic import BaseModel
@@ -18,6 +33,41 @@ from pydantic import BaseModel
 # API設定
 API_BASE_URL = "https://reder-test-o5k8.onrender.com"
 
+# イベント監視設定（watch_eventsとイベントストアの差分更新で共有）
+WATCH_POLL_INTERVAL = float(os.environ.get("WATCH_POLL_INTERVAL", "60"))
+WATCH_LOOKBACK_DAYS = int(os.environ.get("WATCH_LOOKBACK_DAYS", "30"))
+WATCH_HISTORY_SIZE = int(os.environ.get("WATCH_HISTORY_SIZE", "100"))
+# 購読者ごとのキューは、再送する差分全体とreset通知が収まる大きさにする
+WATCH_QUEUE_SIZE = WATCH_HISTORY_SIZE + 1
+
+# イベントストア設定（get_eventsのメモリ内検索）
+EVENT_STORE_TTL = float(os.environ.get("EVENT_STORE_TTL", "3600"))
+EVENT_HISTORY_START_DATE = os.environ.get("EVENT_HISTORY_START_DATE", "20000101")
+# 再取得に失敗してから次の再取得を始めるまでの待機時間（秒）
+EVENT_REFRESH_COOLDOWN = float(os.environ.get("EVENT_REFRESH_COOLDOWN", "300"))
+
+# 成果物インデックス設定（get_event_products）
+PRODUCT_CRAWL_CONCURRENCY = int(os.environ.get("PRODUCT_CRAWL_CONCURRENCY", "4"))
+PRODUCT_CRAWL_INTERVAL = float(os.environ.get("PRODUCT_CRAWL_INTERVAL", "900"))
+PRODUCT_REFRESH_DAYS = int(os.environ.get("PRODUCT_REFRESH_DAYS", "30"))
+PRODUCT_FETCH_LIMIT = int(os.environ.get("PRODUCT_FETCH_LIMIT", "20"))
+# 検索時の取得を打ち切る、リクエスト期限までの余裕（秒）
+PRODUCT_JOIN_MARGIN = 0.5
+
+# リクエスト期限設定（クライアントの指定がない場合はREQUEST_TIMEOUTを使用）
+UPSTREAM_TIMEOUT = 30.0
+REQUEST_TIMEOUT = float(os.environ.get("REQUEST_TIMEOUT", "30"))
+MAX_REQUEST_TIMEOUT = float(os.environ.get("MAX_REQUEST_TIMEOUT", "120"))
+
+# リクエストトレース設定（TRACE_ENABLEDを指定した場合のみ有効）
+TRACE_ENABLED = os.environ.get("TRACE_ENABLED", "").lower() in ("1", "true", "yes")
+TRACE_SLOW_MS = float(os.environ.get("TRACE_SLOW_MS", "1000"))
+TRACE_HISTORY_SIZE = int(os.environ.get("TRACE_HISTORY_SIZE", "100"))
+TRACE_PROFILE_RATE = float(os.environ.get("TRACE_PROFILE_RATE", "0"))
+TRACE_PROFILE_DIR = os.environ.get("TRACE_PROFILE_DIR", "profiles")
+TRACE_PROFILE_MAX_FILES = int(os.environ.get("TRACE_PROFILE_MAX_FILES", "20"))
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
 # FastAPIアプリケーションの初期化
 app = FastAPI(
     title="Sentinel Asia EOR MCP Server",
@@ -43,6 +93,180 @@ class MCPResponse(BaseModel):
     result: Optional[Any] = None
     error: Optional[MCPError] = None
 
+# リクエストトレース
+class RequestTrace:
+    """1リクエスト分のフェーズ別所要時間（ミリ秒）
+
+    フェーズ: parse（リクエストJSON解析）、store（イベントストア検索）、
+    upstream（上流APIへのリクエスト）、upstream_json（上流レスポンスの解析）、
+    serialize（json.dumps）、encode（model_dump_json）。
+    storeには再取得時のupstreamが含まれる。
+    クライアントの切断などで中断したリクエストはcancelledとして記録する。
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now().isoformat(timespec="milliseconds")
+        self.method: Optional[str] = None
+        self.tool: Optional[str] = None
+        self.phases: Dict[str, float] = {}
+        self.total_ms = 0.0
+        self.cancelled = False
+        self.profile_path: Optional[str] = None
+        self._start = time.perf_counter()
+        self._finished = False
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds * 1000
+
+    def finish(self) -> None:
+        """所要時間を確定（2回目以降の呼び出しは無視）"""
+        if self._finished:
+            return
+        self._finished = True
+        self.total_ms = (time.perf_counter() - self._start) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "method": self.method,
+            "tool": self.tool,
+            "total_ms": round(self.total_ms, 3),
+            "cancelled": self.cancelled,
+            "phases": {phase: round(ms, 3) for phase, ms in self.phases.items()},
+            "profile": self.profile_path
+        }
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+slow_traces: deque = deque(maxlen=TRACE_HISTORY_SIZE)
+_profiler_active = False
+# 保存中のプロファイル結果（タスクがGCで破棄されないよう参照を保持）
+_profile_writes: set = set()
+
+@contextmanager
+def trace_phase(phase: str):
+    """現在のリクエストのトレースにフェーズの所要時間を加算（トレース無効時は何もしない）"""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(phase, time.perf_counter() - start)
+
+def start_trace() -> Optional[RequestTrace]:
+    """トレースが有効であれば新しいトレースを開始"""
+    if not TRACE_ENABLED:
+        return None
+    trace = RequestTrace()
+    current_trace.set(trace)
+    return trace
+
+def finish_trace(trace: Optional[RequestTrace]) -> None:
+    """トレースを終了し、閾値を超えたリクエストを記録・ログ出力"""
+    if trace is None:
+        return
+    trace.finish()
+    if trace.total_ms < TRACE_SLOW_MS:
+        return
+    slow_traces.append(trace)
+    breakdown = ", ".join(f"{phase}={ms:.1f}ms" for phase, ms in trace.phases.items())
+    print(
+        f"Slow MCP request: method={trace.method} tool={trace.tool} "
+        f"total={trace.total_ms:.1f}ms{' cancelled' if trace.cancelled else ''} ({breakdown})",
+        file=sys.stderr
+    )
+
+def start_profile() -> Optional[cProfile.Profile]:
+    """TRACE_PROFILE_RATEの確率でリクエストをプロファイル（同時に1件まで）
+
+    cProfileはスレッド単位で計測するため、並行して処理中の他のリクエストも結果に含まれる。
+    """
+    global _profiler_active
+    if _profiler_active or TRACE_PROFILE_RATE <= 0 or random.random() >= TRACE_PROFILE_RATE:
+        return None
+    _profiler_active = True
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def prune_profiles() -> None:
+    """TRACE_PROFILE_DIRのプロファイル結果を新しいものからTRACE_PROFILE_MAX_FILES件に制限"""
+    profiles = sorted(name for name in os.listdir(TRACE_PROFILE_DIR) if name.endswith(".prof"))
+    for name in profiles[:max(len(profiles) - TRACE_PROFILE_MAX_FILES, 0)]:
+        os.remove(os.path.join(TRACE_PROFILE_DIR, name))
+
+def write_profile(profiler: cProfile.Profile, path: str) -> None:
+    """プロファイル結果を保存し、古いものから削除（別スレッドで実行）"""
+    os.makedirs(TRACE_PROFILE_DIR, exist_ok=True)
+    profiler.dump_stats(path)
+    prune_profiles()
+
+def finish_profile(profiler: Optional[cProfile.Profile], trace: Optional[RequestTrace]) -> None:
+    """プロファイルを停止し、結果の保存をバックグラウンドで開始
+
+    キャンセル時のfinallyからも呼ぶため保存は待たない。ファイル操作はイベントループを
+    止めないよう別スレッドで行い、保存が終わるまで次のプロファイルは開始しない。
+    """
+    if profiler is None:
+        return
+    profiler.disable()
+    path = os.path.join(TRACE_PROFILE_DIR, f"{datetime.now():%Y%m%d-%H%M%S-%f}.prof")
+    task = asyncio.create_task(asyncio.to_thread(write_profile, profiler, path), context=Context())
+    _profile_writes.add(task)
+    task.add_done_callback(lambda task: profile_written(task, trace, path))
+
+def profile_written(task: asyncio.Task, trace: Optional[RequestTrace], path: str) -> None:
+    global _profiler_active
+    _profile_writes.discard(task)
+    _profiler_active = False
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        print(f"Failed to write profile: {task.exception()}", file=sys.stderr)
+    elif trace is not None:
+        trace.profile_path = path
+
+# リクエスト期限
+current_deadline: ContextVar[Optional[float]] = ContextVar("current_deadline", default=None)
+
+def request_deadline(request: MCPRequest, header_timeout: Optional[str] = None) -> float:
+    """クライアント指定のタイムアウトからリクエストの期限（ループ時刻）を算出
+
+    `params._meta.timeout` または `X-MCP-Timeout` ヘッダー（秒）を優先し、
+    指定がない場合や正の有限値でない場合はREQUEST_TIMEOUTを使う。上限はMAX_REQUEST_TIMEOUT。
+    """
+    meta = (request.params or {}).get("_meta")
+    candidates = [meta.get("timeout") if isinstance(meta, dict) else None, header_timeout]
+    timeout = REQUEST_TIMEOUT
+    for value in candidates:
+        if value is None or isinstance(value, bool):
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if math.isfinite(value) and value > 0:
+            timeout = value
+            break
+    timeout = min(timeout, MAX_REQUEST_TIMEOUT)
+    return asyncio.get_running_loop().time() + timeout
+
+def remaining_time() -> Optional[float]:
+    """現在のリクエストの期限までの残り時間（期限がなければNone）"""
+    deadline = current_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - asyncio.get_running_loop().time()
+
+def upstream_timeout() -> float:
+    """上流リクエストのタイムアウト（リクエストの残り時間を超えない）"""
+    remaining = remaining_time()
+    if remaining is None:
+        return UPSTREAM_TIMEOUT
+    return max(min(UPSTREAM_TIMEOUT, remaining), 0.001)
+
 async def make_api_request(
     endpoint: str, 
     params: Optional[Dict[str, str]] = None
@@ -50,13 +274,15 @@ async def make_api_request(
     """APIリクエストを実行する共通関数"""
     async with httpx.AsyncClient() as client:
         try:
-            response = await client.get(
-                f"{API_BASE_URL}/{endpoint}",
-                params=params or {},
-                timeout=30.0
-            )
+            with trace_phase("upstream"):
+                response = await client.get(
+                    f"{API_BASE_URL}/{endpoint}",
+                    params=params or {},
+                    timeout=upstream_timeout()
+                )
             response.raise_for_status()
-            return response.json()
+            with trace_phase("upstream_json"):
+                return response.json()
         except httpx.HTTPStatusError as e:
             error_messages = {
                 400: "無効なリクエストパラメータです",
@@ -67,6 +293,477 @@ async def make_api_request(
         except Exception as e:
             raise Exception(f"リクエストエラー: {str(e)}")
 
+def split_filter(value: Optional[str]) -> Optional[set]:
+    """カンマ区切りのフィルタ値を大文字の集合に変換"""
+    if not value:
+        return None
+    items = {item.strip().upper() for item in value.split(",") if item.strip()}
+    return items or None
+
+@lru_cache(maxsize=65536)
+def parse_date_ordinal(value: Optional[str]) -> int:
+    """YYYYMMDD / YYYY-MM-DD 形式の日付を日序数に変換（解析できない場合は0）"""
+    if not value:
+        return 0
+    text = value.strip()
+    if text[4:5] in ("-", "/"):
+        digits = text[:10].replace(text[4], "")
+    else:
+        digits = text[:8]
+    if len(digits) != 8 or not digits.isdigit():
+        return 0
+    try:
+        return date(int(digits[:4]), int(digits[4:6]), int(digits[6:8])).toordinal()
+    except ValueError:
+        return 0
+
+def parse_date_argument(value: Any) -> Optional[int]:
+    """ツール引数の日付を日序数に変換（不正な形式はValueError）"""
+    if value is None or value == "":
+        return None
+    ordinal = parse_date_ordinal(value) if isinstance(value, str) else 0
+    if not ordinal:
+        raise ValueError(f"Invalid date: {value} (YYYYMMDD または YYYY-MM-DD 形式で指定してください)")
+    return ordinal
+
+def parse_filter_argument(name: str, value: Any) -> Optional[set]:
+    """ツール引数のカンマ区切りの絞り込み条件を集合に変換（文字列以外はValueError）"""
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid {name}: {value} (カンマ区切りの文字列で指定してください)")
+    return split_filter(value)
+
+# EventInfoの項目（カテゴリ項目と日付は同じ文字列が多数のイベントで繰り返される）
+EVENT_FIELDS = (
+    "name", "description", "disaster_type", "country", "country_iso3",
+    "occurrence_date", "sa_activation_date", "requester",
+    "escalation_to_charter", "glide_number", "url"
+)
+EVENT_FIELD_SET = frozenset(EVENT_FIELDS)
+INTERNED_EVENT_FIELDS = frozenset({
+    "disaster_type", "country", "country_iso3", "occurrence_date",
+    "sa_activation_date", "requester", "escalation_to_charter"
+})
+
+# 上流のレスポンスに含まれていたキーの並び（同じ並びはレコード間で共有する）
+_key_orders: Dict[tuple, tuple] = {}
+
+def shared_keys(data: Dict[str, Any]) -> tuple:
+    keys = tuple(data)
+    return _key_orders.setdefault(keys, keys)
+
+class EventRecord:
+    """メモリ上で保持するイベント1件（スロット付き、カテゴリ項目は文字列を共有）
+
+    APIのレスポンス形式（dict）への変換は`to_dict`でレスポンス生成時にのみ行い、
+    上流のレスポンスに含まれていたキーだけを元の並びで出力する。
+    """
+
+    __slots__ = EVENT_FIELDS + ("keys", "extra")
+
+    def __init__(self, event: Dict[str, Any]):
+        for field in EVENT_FIELDS:
+            value = event.get(field)
+            if field in INTERNED_EVENT_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, field, value)
+        self.keys = shared_keys(event)
+        extra = {key: value for key, value in event.items() if key not in EVENT_FIELD_SET}
+        self.extra = extra or None
+
+    def to_dict(self) -> Dict[str, Any]:
+        extra = self.extra
+        return {
+            key: getattr(self, key) if key in EVENT_FIELD_SET else extra[key]
+            for key in self.keys
+        }
+
+def event_ordinal(record: EventRecord) -> int:
+    """イベントの基準日（発生日、なければSA発動日）の日序数"""
+    return parse_date_ordinal(record.occurrence_date) or parse_date_ordinal(record.sa_activation_date)
+
+# 行ごとのセレクタ（0/1のバイト列）とビット列（'0'/'1'）の相互変換
+SELECTOR_TO_BITS = bytes.maketrans(b"\x00\x01", b"01")
+BITS_TO_SELECTOR = bytes.maketrans(b"01", b"\x00\x01")
+SET_BIT = re.compile("1")
+# 結果の取り出し方の切り替え：これ以下の件数はビットを1つずつ、
+# 範囲の1/4を超える場合はcompress、それ以外は正規表現で該当行のみを取り出す
+SPARSE_RESULT_SIZE = 16
+
+def selector_mask(selector: bytearray) -> int:
+    """行ごとのセレクタを、行番号をビット位置とする整数のビットマスクに変換"""
+    return int(selector[::-1].translate(SELECTOR_TO_BITS), 2)
+
+class EventTable:
+    """EventRecordを基準日順に並べたテーブル
+
+    基準日は`array('i')`の日序数列として保持し、期間はbisectで行範囲に変換する。
+    国・災害タイプ・GLIDE番号は行番号の転置リストを持ち、条件が1つだけの検索は
+    転置リストの範囲を切り出して返す。複数の条件は、国・災害タイプごとに持つ
+    該当行のビットマスク（整数）のOR/ANDで絞り込む。
+    基準日のないイベントは先頭に並び、期間を指定した検索からは除外される。
+    """
+
+    def __init__(self, events: List[EventRecord]):
+        ordinals = [event_ordinal(event) for event in events]
+        order = sorted(range(len(events)), key=ordinals.__getitem__)
+        rows = [events[index] for index in order]
+        self.events = rows
+        self.dates = array("i", (ordinals[index] for index in order))
+        self.undated = bisect_right(self.dates, 0)
+        self.by_country: Dict[str, array] = {}
+        self.by_type: Dict[str, array] = {}
+        self.by_glide: Dict[str, array] = {}
+        for index, event in enumerate(rows):
+            for code in split_filter(event.country_iso3) or ():
+                self.by_country.setdefault(code, array("i")).append(index)
+            disaster_type = (event.disaster_type or "").strip().upper()
+            if disaster_type:
+                self.by_type.setdefault(disaster_type, array("i")).append(index)
+            for glide_number in split_filter(event.glide_number) or ():
+                self.by_glide.setdefault(glide_number, array("i")).append(index)
+        self.country_masks = {key: self._mask(posting) for key, posting in self.by_country.items()}
+        self.type_masks = {key: self._mask(posting) for key, posting in self.by_type.items()}
+
+    def _mask(self, posting: array) -> int:
+        selector = bytearray(len(self.events))
+        for index in posting:
+            selector[index] = 1
+        return selector_mask(selector)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def merged(self, events: List[Dict[str, Any]]) -> "EventTable":
+        """新規・更新イベントをURLをキーに反映したテーブルを返す（変更がなければ自身）"""
+        merged = {record.url or id(record): record for record in self.events}
+        changed = False
+        for event in events:
+            record = EventRecord(event)
+            key = record.url or id(record)
+            previous = merged.get(key)
+            if previous is not None and previous.to_dict() == record.to_dict():
+                continue
+            merged[key] = record
+            changed = True
+        return EventTable(list(merged.values())) if changed else self
+
+    def query(
+        self,
+        countries: Optional[set] = None,
+        disaster_types: Optional[set] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        glide_numbers: Optional[set] = None
+    ) -> List[EventRecord]:
+        """条件に一致するイベントを基準日の昇順で返す"""
+        lo = bisect_left(self.dates, start) if start else 0
+        hi = bisect_right(self.dates, end) if end else len(self.dates)
+        if start or end:
+            lo = max(lo, self.undated)
+        if lo >= hi:
+            return []
+        filters = [
+            (self.by_country, countries),
+            (self.by_type, disaster_types),
+            (self.by_glide, glide_numbers)
+        ]
+        filters = [(index, keys) for index, keys in filters if keys is not None]
+        events = self.events
+        if not filters:
+            return events[lo:hi]
+        if len(filters) == 1 and len(filters[0][1]) == 1:
+            index, keys = filters[0]
+            posting = index.get(next(iter(keys)))
+            if not posting:
+                return []
+            return [events[row] for row in posting[bisect_left(posting, lo):bisect_left(posting, hi)]]
+        mask = (1 << hi) - (1 << lo)
+        for masks, keys in ((self.country_masks, countries), (self.type_masks, disaster_types)):
+            if keys is not None:
+                selected = 0
+                for key in keys:
+                    selected |= masks.get(key, 0)
+                mask &= selected
+        if glide_numbers is not None:
+            selected = 0
+            for key in glide_numbers:
+                for index in self.by_glide.get(key, ()):
+                    selected |= 1 << index
+            mask &= selected
+        mask >>= lo
+        count = mask.bit_count()
+        if count <= SPARSE_RESULT_SIZE:
+            rows = []
+            while mask:
+                lowest = mask & -mask
+                rows.append(events[lo + lowest.bit_length() - 1])
+                mask ^= lowest
+            return rows
+        bits = bin(mask)[:1:-1]
+        if count * 4 > len(bits):
+            return list(compress(events[lo:lo + len(bits)], bits.encode().translate(BITS_TO_SELECTOR)))
+        return [events[lo + match.start()] for match in SET_BIT.finditer(bits)]
+
+def build_event_table(events: List[Dict[str, Any]]) -> EventTable:
+    return EventTable([EventRecord(event) for event in events])
+
+class EventStore:
+    """EOR履歴全体をメモリ上に保持し、get_eventsの検索を処理する
+
+    履歴はTTLごとに上流から再取得し、その間はEventWatcherが監視期間分を
+    WATCH_POLL_INTERVALごとにポーリングした結果で更新する（購読者の有無に関係なく動く）。
+    再取得中はそれまでの履歴で応答し、履歴が未取得の間は検索を上流に転送する。
+    `as_of`は保持している内容が上流と一致していた時刻（最後に反映した取得の開始時刻）。
+    同時に発生した再取得は1回の上流リクエストにまとめ、失敗した場合は
+    cooldown秒が経つまで新たな再取得を始めない。共有の再取得は
+    呼び出し元の期限やキャンセルの影響を受けないよう、独立したコンテキストで実行する。
+    テーブルの構築はイベントループを止めないよう別スレッドで行う。
+    """
+
+    def __init__(self, ttl: float, cooldown: float):
+        self.ttl = ttl
+        self.cooldown = cooldown
+        self.table = EventTable([])
+        self._loaded_at: Optional[float] = None
+        self._as_of: Optional[datetime] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._failed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    @property
+    def stale(self) -> bool:
+        return not self.loaded or time.monotonic() - self._loaded_at >= self.ttl
+
+    @property
+    def as_of(self) -> Optional[str]:
+        return self._as_of.isoformat() if self._as_of is not None else None
+
+    async def refresh(self) -> None:
+        """履歴全体を上流から取得してテーブルを再構築"""
+        fetched_at = datetime.now(timezone.utc)
+        events = await make_api_request("get_events", {"start_date": EVENT_HISTORY_START_DATE})
+        async with self._lock:
+            self.table = await asyncio.to_thread(build_event_table, events or [])
+            self._loaded_at = time.monotonic()
+            self._as_of = fetched_at
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is None:
+            self._failed_at = None
+            return
+        self._failed_at = time.monotonic()
+        print(f"event store refresh failed: {task.exception()}", file=sys.stderr)
+
+    def start_refresh(self) -> Optional[asyncio.Task]:
+        """再取得が動いていなければ開始（失敗後の待機中はNone）"""
+        if self._refresh_task is None or self._refresh_task.done():
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self.cooldown:
+                return None
+            self._refresh_task = asyncio.create_task(self.refresh(), context=Context())
+            self._refresh_task.add_done_callback(self._refresh_done)
+        return self._refresh_task
+
+    async def ensure_fresh(self) -> None:
+        """TTLを過ぎていれば再取得を待つ（取得済みの履歴があれば失敗時はそれを使う）"""
+        if not self.stale:
+            return
+        task = self.start_refresh()
+        if task is None:
+            if not self.loaded:
+                raise RuntimeError("Event history is unavailable (refresh failed recently)")
+            return
+        try:
+            await asyncio.shield(task)
+        except Exception:
+            if not self.loaded:
+                raise
+
+    async def ingest(self, events: List[Dict[str, Any]], fetched_at: datetime) -> None:
+        """監視期間のポーリング結果をURLをキーにテーブルへ反映
+
+        差分ではなく監視期間全体を受け取るため、再取得と入れ違いになった更新も
+        次のポーリングで反映される。
+        """
+        if not self.loaded:
+            return
+        async with self._lock:
+            if events:
+                self.table = await asyncio.to_thread(self.table.merged, events)
+            if fetched_at > self._as_of:
+                self._as_of = fetched_at
+
+    async def query(
+        self,
+        countries: Optional[set] = None,
+        disaster_types: Optional[set] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        glide_numbers: Optional[set] = None
+    ) -> Tuple[List[EventRecord], str]:
+        """条件に一致するイベントを基準日の昇順で、結果の基準時刻とともに返す"""
+        event_watcher.start()
+        if self.stale:
+            self.start_refresh()
+        if self.loaded:
+            table = self.table
+            as_of = self.as_of
+        else:
+            as_of = datetime.now(timezone.utc).isoformat()
+            params = {}
+            if countries:
+                params["countryiso3s"] = ",".join(sorted(countries))
+            if start:
+                params["start_date"] = date.fromordinal(start).strftime("%Y%m%d")
+            if end:
+                params["end_date"] = date.fromordinal(end).strftime("%Y%m%d")
+            events = await make_api_request("get_events", params)
+            table = await asyncio.to_thread(build_event_table, events or [])
+        return table.query(countries, disaster_types, start, end, glide_numbers), as_of
+
+event_store = EventStore(EVENT_STORE_TTL, EVENT_REFRESH_COOLDOWN)
+
+# ProductInfoの項目
+PRODUCT_FIELDS = ("date", "title", "download_url", "view_url", "file_type")
+PRODUCT_FIELD_SET = frozenset(PRODUCT_FIELDS)
+INTERNED_PRODUCT_FIELDS = frozenset({"date", "file_type"})
+
+class ProductRecord:
+    """メモリ上で保持する成果物1件（スロット付き、日付・ファイル種別は文字列を共有）
+
+    `to_dict`は上流のレスポンスに含まれていたキーだけを元の並びで出力する。
+    """
+
+    __slots__ = PRODUCT_FIELDS + ("keys", "extra")
+
+    def __init__(self, product: Dict[str, Any]):
+        for field in PRODUCT_FIELDS:
+            value = product.get(field)
+            if field in INTERNED_PRODUCT_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, field, value)
+        self.keys = shared_keys(product)
+        extra = {key: value for key, value in product.items() if key not in PRODUCT_FIELD_SET}
+        self.extra = extra or None
+
+    def to_dict(self) -> Dict[str, Any]:
+        extra = self.extra
+        return {
+            key: getattr(self, key) if key in PRODUCT_FIELD_SET else extra[key]
+            for key in self.keys
+        }
+
+class ProductIndex:
+    """イベントURLから成果物リストを引く索引
+
+    バックグラウンドのクローラーがイベント履歴を新しい順に巡回して索引を埋める。
+    成果物が追加されうる最近のイベントは巡回のたびに再取得する。
+    上流へのリクエストは同時実行数を制限し、同じURLの取得は共有する。
+    クローラーは同時実行数ずつ取得するため、検索時の取得が巡回の後ろで待たされない。
+    """
+
+    def __init__(self, concurrency: int):
+        self.by_url: Dict[str, tuple] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._crawler: Optional[asyncio.Task] = None
+
+    def store(self, url: str, products: Any) -> None:
+        if not isinstance(products, list):
+            return
+        self.by_url[url] = tuple(ProductRecord(product) for product in products if isinstance(product, dict))
+
+    async def _fetch(self, url: str) -> None:
+        async with self._semaphore:
+            products = await make_api_request("get_products", {"url": url})
+        self.store(url, products)
+
+    def _done(self, url: str, task: asyncio.Task) -> None:
+        self._inflight.pop(url, None)
+        if not task.cancelled():
+            task.exception()
+
+    def fetch(self, url: str) -> asyncio.Task:
+        """URLの成果物を取得するタスク（取得中であれば同じタスクを返す）"""
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.create_task(self._fetch(url), context=Context())
+            self._inflight[url] = task
+            task.add_done_callback(lambda done: self._done(url, done))
+        return task
+
+    async def fetch_all(self, urls: List[str]) -> List[str]:
+        """複数URLの成果物を取得し、失敗したURLを返す"""
+        results = await asyncio.gather(
+            *(asyncio.shield(self.fetch(url)) for url in urls),
+            return_exceptions=True
+        )
+        return [url for url, result in zip(urls, results) if isinstance(result, Exception)]
+
+    def start(self) -> None:
+        """クローラーが動いていなければ起動"""
+        if self._crawler is None or self._crawler.done():
+            self._crawler = asyncio.create_task(self._crawl(), context=Context())
+
+    async def _crawl(self) -> None:
+        while True:
+            try:
+                await event_store.ensure_fresh()
+                table = event_store.table
+                recent = date.today().toordinal() - PRODUCT_REFRESH_DAYS
+                urls = [
+                    event.url
+                    for ordinal, event in zip(reversed(table.dates), reversed(table.events))
+                    if event.url and (event.url not in self.by_url or ordinal >= recent)
+                ]
+                failed = []
+                for offset in range(0, len(urls), PRODUCT_CRAWL_CONCURRENCY):
+                    failed += await self.fetch_all(urls[offset:offset + PRODUCT_CRAWL_CONCURRENCY])
+                if failed:
+                    print(f"product crawl: {len(failed)} of {len(urls)} URLs failed", file=sys.stderr)
+            except Exception as e:
+                print(f"product crawl failed: {e}", file=sys.stderr)
+            await asyncio.sleep(PRODUCT_CRAWL_INTERVAL)
+
+    async def join(self, events: List[EventRecord]) -> List[Dict[str, Any]]:
+        """イベントに成果物を結合（未索引のURLはPRODUCT_FETCH_LIMIT件まで取得）
+
+        取得はリクエスト期限のPRODUCT_JOIN_MARGIN秒前まで待ち、間に合わなかった
+        イベントはproductsをnullとして返す（取得自体は継続し、索引に反映される）。
+        """
+        self.start()
+        missing = [event.url for event in events if event.url and event.url not in self.by_url]
+        if missing and PRODUCT_FETCH_LIMIT > 0:
+            tasks = [self.fetch(url) for url in reversed(missing[-PRODUCT_FETCH_LIMIT:])]
+            remaining = remaining_time()
+            timeout = None if remaining is None else max(remaining - PRODUCT_JOIN_MARGIN, 0)
+            if timeout != 0:
+                await asyncio.wait(tasks, timeout=timeout)
+        result = []
+        for event in events:
+            products = self.by_url.get(event.url) if event.url else None
+            result.append({
+                "event": event.to_dict(),
+                "products": None if products is None else [product.to_dict() for product in products]
+            })
+        return result
+
+product_index = ProductIndex(PRODUCT_CRAWL_CONCURRENCY)
+
+def text_content(result: Any, as_of: Optional[str] = None) -> Dict[str, Any]:
+    """ツールの結果をMCPのテキストコンテンツに変換（as_ofは結果の基準時刻として_metaに付与）"""
+    with trace_phase("serialize"):
+        text = json.dumps(result, ensure_ascii=False, indent=2)
+    content = {"content": [{"type": "text", "text": text}]}
+    if as_of is not None:
+        content["_meta"] = {"as_of": as_of}
+    return content
+
 # MCPツール定義
 TOOLS = {
     "get_countries": {
@@ -89,7 +786,7 @@ TOOLS = {
     },
     "get_events": {
         "name": "get_events",
-        "description": "災害イベント（EOR）情報を取得します。",
+        "description": "災害イベント（EOR）情報を取得します。結果は発生日（なければSA発動日）の昇順で、期間を指定した場合は日付のないイベントを除きます。",
         "inputSchema": {
             "type": "object",
             "properties": {
@@ -104,6 +801,10 @@ TOOLS = {
                 "end_date": {
                     "type": "string",
                     "description": "終了日（YYYYMMDD または YYYY-MM-DD 形式）"
+                },
+                "disaster_types": {
+                    "type": "string",
+                    "description": "カンマ区切りの災害タイプ（例：Typhoon,Flood）"
                 }
             },
             "required": []
@@ -122,6 +823,36 @@ TOOLS = {
             },
             "required": ["url"]
         }
+    },
+    "get_event_products": {
+        "name": "get_event_products",
+        "description": "条件に一致する災害イベント（EOR）とその成果物（プロダクト）をまとめて取得します。成果物が未取得のイベントはproductsがnullになります。",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "countryiso3s": {
+                    "type": "string",
+                    "description": "カンマ区切りのISO3国コード（例：PHL,VNM）"
+                },
+                "disaster_types": {
+                    "type": "string",
+                    "description": "カンマ区切りの災害タイプ（例：Typhoon,Flood）"
+                },
+                "start_date": {
+                    "type": "string",
+                    "description": "開始日（YYYYMMDD または YYYY-MM-DD 形式）"
+                },
+                "end_date": {
+                    "type": "string",
+                    "description": "終了日（YYYYMMDD または YYYY-MM-DD 形式）"
+                },
+                "glide_number": {
+                    "type": "string",
+                    "description": "カンマ区切りのGLIDE番号"
+                }
+            },
+            "required": []
+        }
     }
 }
 
@@ -156,23 +887,33 @@ async def handle_mcp_request(request: MCPRequest) -> MCPResponse:
             
             if tool_name == "get_countries":
                 result = await make_api_request("get_countries")
-                return MCPResponse(id=request.id, result={"content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False, indent=2)}]})
+                return MCPResponse(id=request.id, result=text_content(result))
             
             elif tool_name == "get_metadata":
                 result = await make_api_request("get_metadata")
-                return MCPResponse(id=request.id, result={"content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False, indent=2)}]})
+                return MCPResponse(id=request.id, result=text_content(result))
             
             elif tool_name == "get_events":
-                api_params = {}
-                if arguments.get("countryiso3s"):
-                    api_params["countryiso3s"] = arguments["countryiso3s"]
-                if arguments.get("start_date"):
-                    api_params["start_date"] = arguments["start_date"]
-                if arguments.get("end_date"):
-                    api_params["end_date"] = arguments["end_date"]
+                try:
+                    start = parse_date_argument(arguments.get("start_date"))
+                    end = parse_date_argument(arguments.get("end_date"))
+                    countries = parse_filter_argument("countryiso3s", arguments.get("countryiso3s"))
+                    disaster_types = parse_filter_argument("disaster_types", arguments.get("disaster_types"))
+                except ValueError as e:
+                    return MCPResponse(
+                        id=request.id,
+                        error=MCPError(code=-32602, message=str(e))
+                    )
                 
-                result = await make_api_request("get_events", api_params)
-                return MCPResponse(id=request.id, result={"content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False, indent=2)}]})
+                with trace_phase("store"):
+                    records, as_of = await event_store.query(
+                        countries=countries,
+                        disaster_types=disaster_types,
+                        start=start,
+                        end=end
+                    )
+                    result = [record.to_dict() for record in records]
+                return MCPResponse(id=request.id, result=text_content(result, as_of))
             
             elif tool_name == "get_products":
                 if not arguments.get("url"):
@@ -182,7 +923,32 @@ async def handle_mcp_request(request: MCPRequest) -> MCPResponse:
                     )
                 
                 result = await make_api_request("get_products", {"url": arguments["url"]})
-                return MCPResponse(id=request.id, result={"content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False, indent=2)}]})
+                product_index.store(arguments["url"], result)
+                return MCPResponse(id=request.id, result=text_content(result))
+            
+            elif tool_name == "get_event_products":
+                try:
+                    start = parse_date_argument(arguments.get("start_date"))
+                    end = parse_date_argument(arguments.get("end_date"))
+                    countries = parse_filter_argument("countryiso3s", arguments.get("countryiso3s"))
+                    disaster_types = parse_filter_argument("disaster_types", arguments.get("disaster_types"))
+                    glide_numbers = parse_filter_argument("glide_number", arguments.get("glide_number"))
+                except ValueError as e:
+                    return MCPResponse(
+                        id=request.id,
+                        error=MCPError(code=-32602, message=str(e))
+                    )
+                
+                with trace_phase("store"):
+                    records, as_of = await event_store.query(
+                        countries=countries,
+                        disaster_types=disaster_types,
+                        start=start,
+                        end=end,
+                        glide_numbers=glide_numbers
+                    )
+                    result = await product_index.join(records)
+                return MCPResponse(id=request.id, result=text_content(result, as_of))
             
             else:
                 return MCPResponse(
@@ -202,6 +968,176 @@ async def handle_mcp_request(request: MCPRequest) -> MCPResponse:
             error=MCPError(code=-32603, message=str(e))
         )
 
+class WatchSubscription:
+    """watch_events購読者ごとのフィルタと配信キュー
+
+    キューには`(SSEのイベント名, ID, データ)`を積む。
+    """
+
+    def __init__(self, countries: Optional[set], disaster_types: Optional[set]):
+        self.countries = countries
+        self.disaster_types = disaster_types
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WATCH_QUEUE_SIZE)
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        """イベントが購読フィルタに一致するか判定"""
+        if self.countries is not None:
+            codes = split_filter(event.get("country_iso3")) or set()
+            if not codes & self.countries:
+                return False
+        if self.disaster_types is not None:
+            disaster_type = (event.get("disaster_type") or "").strip().upper()
+            if disaster_type not in self.disaster_types:
+                return False
+        return True
+
+    def push(self, event_id: str, changes: List[Dict[str, Any]]) -> None:
+        """フィルタに一致する差分をキューに追加（溢れた場合は未配信分を破棄してresetを送る）"""
+        matched = [change for change in changes if self.matches(change["event"])]
+        if not matched:
+            return
+        if self.queue.full():
+            self.reset(event_id, "overflow")
+            return
+        self.queue.put_nowait(("events", event_id, matched))
+
+    def reset(self, event_id: str, reason: str) -> None:
+        """未配信の差分を破棄し、get_eventsでの再取得を促すresetイベントを送る"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(("reset", event_id, {"reason": reason}))
+
+class EventWatcher:
+    """上流のイベント一覧を単一のポーラーで監視し、差分のみを購読者へ配信する
+
+    差分はイベントURLと`sa_activation_date`をキーに判定する。
+    ポーラーは最初の購読またはイベント検索で起動し、以降は購読者の有無に関係なく動き続け、
+    毎回の結果をイベントストアにも反映する。ストアを更新し続けるためで、
+    呼び出し元の期限を引き継がないよう独立したコンテキストで実行する。
+    配信した差分には`<起動時刻>-<連番>`のIDを付け、直近WATCH_HISTORY_SIZE件を保持して
+    `Last-Event-ID`で再接続したクライアントに再送する。指定されたIDの続きが既に
+    破棄されている場合（別プロセスのIDを含む）や購読者のキューが溢れた場合は、
+    差分の代わりに最新のIDを付けたresetイベントを送り、get_eventsでの再取得を促す。
+    """
+
+    def __init__(self, interval: float, lookback_days: int):
+        self.interval = interval
+        self.lookback_days = lookback_days
+        self._seen: Dict[str, tuple] = {}
+        self._primed = False
+        self._subscribers: set = set()
+        self._task: Optional[asyncio.Task] = None
+        self._epoch = str(int(time.time()))
+        self._sequence = 0
+        self._history: deque = deque(maxlen=WATCH_HISTORY_SIZE)
+
+    def subscribe(
+        self,
+        countries: Optional[set],
+        disaster_types: Optional[set],
+        last_event_id: Optional[str] = None
+    ) -> WatchSubscription:
+        """購読を登録し、Last-Event-ID以降の差分を再送して、必要であればポーラーを起動"""
+        subscription = WatchSubscription(countries, disaster_types)
+        if last_event_id:
+            last_sequence = self._parse_event_id(last_event_id)
+            oldest = self._history[0][0] if self._history else self._sequence + 1
+            if last_sequence is None or last_sequence > self._sequence or last_sequence + 1 < oldest:
+                subscription.reset(self._event_id(self._sequence), "expired")
+            else:
+                for sequence, changes in self._history:
+                    if sequence > last_sequence:
+                        subscription.push(self._event_id(sequence), changes)
+        self._subscribers.add(subscription)
+        self.start()
+        return subscription
+
+    def unsubscribe(self, subscription: WatchSubscription) -> None:
+        """購読を解除（ポーラーはイベントストアのために動かし続ける）"""
+        self._subscribers.discard(subscription)
+
+    def start(self) -> None:
+        """ポーラーが動いていなければ起動"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), context=Context())
+
+    def _event_id(self, sequence: int) -> str:
+        return f"{self._epoch}-{sequence}"
+
+    def _parse_event_id(self, event_id: Optional[str]) -> Optional[int]:
+        """このプロセスが発行したIDであれば連番を返す"""
+        if not event_id:
+            return None
+        epoch, _, sequence = event_id.partition("-")
+        if epoch != self._epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def diff(self, events: List[Dict[str, Any]], window_start: int) -> List[Dict[str, Any]]:
+        """前回のポーリング結果と比較し、新規・更新イベントを抽出
+
+        監視期間より前の日付で今回の結果に含まれなかったイベントは記録から除く。
+        """
+        changes = []
+        current = set()
+        for event in events:
+            url = event.get("url")
+            if not url:
+                continue
+            current.add(url)
+            activation_date = event.get("sa_activation_date")
+            previous = self._seen.get(url)
+            if previous is None:
+                change = "new"
+            elif previous[0] != activation_date:
+                change = "changed"
+            else:
+                continue
+            ordinal = parse_date_ordinal(event.get("occurrence_date")) or parse_date_ordinal(activation_date)
+            self._seen[url] = (activation_date, ordinal)
+            changes.append({"change": change, "event": event})
+        expired = [
+            url for url, (_, ordinal) in self._seen.items()
+            if url not in current and ordinal < window_start
+        ]
+        for url in expired:
+            del self._seen[url]
+        return changes
+
+    async def poll_once(self) -> List[Dict[str, Any]]:
+        """上流を1回ポーリングし、差分を配信してからイベントストアに反映する
+
+        初回は基準の取得のみで配信しない。差分の記録と配信は待ち合わせを挟まずに行い、
+        ストアへの反映はキャンセルされても中断しないよう別タスクで実行する。
+        """
+        window_start = date.today() - timedelta(days=self.lookback_days)
+        fetched_at = datetime.now(timezone.utc)
+        events = await make_api_request("get_events", {"start_date": window_start.strftime("%Y%m%d")}) or []
+        changes = self.diff(events, window_start.toordinal())
+        if self._primed and changes:
+            self.publish(changes)
+        self._primed = True
+        await asyncio.shield(asyncio.create_task(event_store.ingest(events, fetched_at), context=Context()))
+        return changes
+
+    def publish(self, changes: List[Dict[str, Any]]) -> None:
+        """差分にIDを付けて記録し、各購読者のフィルタに従って配信"""
+        self._sequence += 1
+        self._history.append((self._sequence, changes))
+        event_id = self._event_id(self._sequence)
+        for subscription in list(self._subscribers):
+            subscription.push(event_id, changes)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                print(f"watch_events poll failed: {e}", file=sys.stderr)
+            await asyncio.sleep(self.interval)
+
+event_watcher = EventWatcher(WATCH_POLL_INTERVAL, WATCH_LOOKBACK_DAYS)
+
 @app.get("/")
 async def root():
     """ルートエンドポイント"""
@@ -211,7 +1147,8 @@ async def root():
         "protocol": "MCP",
         "endpoints": {
             "health": "/health",
-            "mcp": "/sse"
+            "mcp": "/sse",
+            "watch_events": "/watch_events"
         }
     }
 
@@ -224,17 +1161,80 @@ async def health_check():
 async def mcp_sse_endpoint(request: Request):
     """MCP SSEエンドポイント"""
     async def event_generator():
+        trace = start_trace()
         try:
-            body = await request.json()
-            mcp_request = MCPRequest(**body)
-            response = await handle_mcp_request(mcp_request)
-            yield {"data": response.model_dump_json()}
+            with trace_phase("parse"):
+                body = await request.json()
+                mcp_request = MCPRequest(**body)
+            if trace is not None:
+                trace.method = mcp_request.method
+                trace.tool = (mcp_request.params or {}).get("name")
+            deadline = request_deadline(mcp_request, request.headers.get("x-mcp-timeout"))
+            current_deadline.set(deadline)
+            profiler = start_profile()
+            try:
+                try:
+                    async with asyncio.timeout_at(deadline):
+                        response = await handle_mcp_request(mcp_request)
+                except TimeoutError:
+                    response = MCPResponse(
+                        id=mcp_request.id,
+                        error=MCPError(code=-32603, message="Request deadline exceeded")
+                    )
+                with trace_phase("encode"):
+                    data = response.model_dump_json()
+            finally:
+                finish_profile(profiler, trace)
+            if trace is not None:
+                trace.finish()
+            yield {"data": data}
+        except asyncio.CancelledError:
+            if trace is not None:
+                trace.cancelled = True
+            raise
         except Exception as e:
             error_response = MCPResponse(
                 id=0,
                 error=MCPError(code=-32700, message=f"Parse error: {str(e)}")
             )
             yield {"data": error_response.model_dump_json()}
+        finally:
+            finish_trace(trace)
+    
+    return EventSourceResponse(event_generator())
+
+@app.get("/admin/traces")
+async def admin_traces(x_admin_token: Optional[str] = Header(None)):
+    """閾値を超えた最近のリクエストのトレースを返す管理用エンドポイント（ADMIN_TOKEN設定時のみ有効）"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return {
+        "enabled": TRACE_ENABLED,
+        "slow_threshold_ms": TRACE_SLOW_MS,
+        "traces": [trace.to_dict() for trace in reversed(slow_traces)]
+    }
+
+@app.get("/watch_events")
+async def watch_events(
+    request: Request,
+    countryiso3s: Optional[str] = None,
+    disaster_types: Optional[str] = None
+):
+    """新規・更新されたEORの差分をSSEで配信するエンドポイント（Last-Event-IDで再開可能）"""
+    async def event_generator():
+        subscription = event_watcher.subscribe(
+            split_filter(countryiso3s),
+            split_filter(disaster_types),
+            request.headers.get("last-event-id")
+        )
+        try:
+            while True:
+                event, event_id, data = await subscription.queue.get()
+                yield {"id": event_id, "event": event, "data": json.dumps(data, ensure_ascii=False)}
+        finally:
+            event_watcher.unsubscribe(subscription)
     
     return EventSourceResponse(event_generator())
 
@@ -246,6 +1246,7 @@ if __name__ == "__main__":
     print(f"Starting Sentinel Asia EOR Pure MCP Server...")
     print(f"Server will bind to {host}:{port}")
     print(f"MCP endpoint: http://{host}:{port}/sse")
+    print(f"Watch endpoint: http://{host}:{port}/watch_events")
     
     # uvicornでアプリを起動
     uvicorn.run(
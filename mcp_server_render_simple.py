@@ -14,6 +14,9 @@ from pydantic import BaseModel, Field
 # API設定
 API_BASE_URL = "https://reder-test-o5k8.onrender.com"
 
+# 上流リクエストの期限（秒）。ツール呼び出しはこの時間を超えると打ち切る
+REQUEST_TIMEOUT = float(os.environ.get("REQUEST_TIMEOUT", "30"))
+
 # MCPサーバーの初期化
 mcp = FastMCP("Sentinel Asia EOR API Server")
 
@@ -24,11 +27,12 @@ async def make_api_request(
     """APIリクエストを実行する共通関数"""
     async with httpx.AsyncClient() as client:
         try:
-            response = await client.get(
-                f"{API_BASE_URL}/{endpoint}",
-                params=params or {},
-                timeout=30.0
-            )
+            async with asyncio.timeout(REQUEST_TIMEOUT):
+                response = await client.get(
+                    f"{API_BASE_URL}/{endpoint}",
+                    params=params or {},
+                    timeout=REQUEST_TIMEOUT
+                )
             response.raise_for_status()
             return response.json()
         except httpx.HTTPStatusError as e:
@@ -38,6 +42,8 @@ async def make_api_request(
                 500: "サーバー内部エラーです"
             }
             raise Exception(f"API Error {e.response.status_code}: {error_messages.get(e.response.status_code, '不明なエラー')}")
+        except TimeoutError:
+            raise Exception(f"リクエストエラー: {REQUEST_TIMEOUT}秒以内に応答がありませんでした")
         except Exception as e:
             raise Exception(f"リクエストエラー: {str(e)}")
 
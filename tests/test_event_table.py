@@ -0,0 +1,141 @@
+"""EventTable.query の結果を全件走査による絞り込みと比較するテスト"""
+
+import random
+import re
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+for module in ("fastapi", "sse_starlette", "httpx", "pydantic", "uvicorn"):
+    pytest.importorskip(module)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import mcp_server_pure as server  # noqa: E402
+
+COUNTRIES = ["PHL", "VNM", "IDN", "JPN", "NPL"]
+TYPES = ["Flood", "typhoon", " Earthquake ", "Landslide"]
+START = date(2015, 1, 1).toordinal()
+END = date(2019, 12, 31).toordinal()
+
+
+def make_events(count=3000, seed=27):
+    rng = random.Random(seed)
+    events = []
+    for index in range(count):
+        countries = rng.choices(COUNTRIES, weights=[40, 30, 15, 10, 5], k=rng.choice([1, 1, 1, 2]))
+        day = date.fromordinal(rng.randint(date(2010, 1, 1).toordinal(), date(2024, 12, 31).toordinal()))
+        event = {
+            "url": f"https://example.org/eor/{index}",
+            "country_iso3": ",".join(dict.fromkeys(countries)),
+            "disaster_type": rng.choice(TYPES),
+        }
+        roll = rng.random()
+        if roll < 0.05:
+            event["occurrence_date"] = "unknown"
+        elif roll < 0.10:
+            event["sa_activation_date"] = day.strftime("%Y%m%d")
+        elif roll > 0.12:
+            event["occurrence_date"] = day.isoformat()
+        if rng.random() < 0.3:
+            event["glide_number"] = f"FL-{index:06d}-{countries[0]}"
+        events.append(event)
+    return events
+
+
+@pytest.fixture(scope="module")
+def table():
+    return server.build_event_table(make_events())
+
+
+def brute_force(table, countries=None, disaster_types=None, start=None, end=None, glide_numbers=None):
+    rows = sorted(table.events, key=server.event_ordinal)
+    result = []
+    for record in rows:
+        ordinal = server.event_ordinal(record)
+        if (start or end) and not ordinal:
+            continue
+        if start and ordinal < start or end and ordinal > end:
+            continue
+        if countries is not None and not countries & (server.split_filter(record.country_iso3) or set()):
+            continue
+        if disaster_types is not None and (record.disaster_type or "").strip().upper() not in disaster_types:
+            continue
+        if glide_numbers is not None and not glide_numbers & (server.split_filter(record.glide_number) or set()):
+            continue
+        result.append(record)
+    return result
+
+
+BOUNDS = [(None, None), (START, None), (None, END), (START, END), (END, START)]
+
+# (条件, 通る分岐)
+CASES = [
+    ({}, "slice"),
+    ({"countries": {"PHL"}}, "posting"),
+    ({"disaster_types": {"FLOOD"}}, "posting"),
+    ({"countries": {"XXX"}}, "posting"),
+    ({"countries": {"PHL", "VNM", "IDN", "JPN"}, "disaster_types": {"FLOOD", "TYPHOON", "EARTHQUAKE"}}, "compress"),
+    ({"countries": {"NPL"}, "disaster_types": {"LANDSLIDE", "EARTHQUAKE"}}, "regex"),
+    ({"countries": {"JPN", "NPL"}}, "regex"),
+    ({"countries": {"PHL"}, "disaster_types": {"XXX"}}, "sparse"),
+]
+
+
+@pytest.fixture
+def used(monkeypatch):
+    """compress・正規表現のどちらで結果を取り出したかを記録する"""
+    used = set()
+    compress = server.compress
+    monkeypatch.setattr(server, "compress", lambda *args: used.add("compress") or compress(*args))
+
+    class SetBit:
+        def finditer(self, bits):
+            used.add("regex")
+            return re.finditer("1", bits)
+
+    monkeypatch.setattr(server, "SET_BIT", SetBit())
+    return used
+
+
+@pytest.mark.parametrize("start, end", BOUNDS)
+@pytest.mark.parametrize("filters, branch", CASES)
+def test_query_matches_brute_force(table, used, filters, branch, start, end):
+    expected = brute_force(table, start=start, end=end, **filters)
+    assert table.query(start=start, end=end, **filters) == expected
+    if branch in ("compress", "regex") and (start, end) != (END, START):
+        assert used == {branch}
+    else:
+        assert not used
+
+
+def test_query_glide_numbers(table, used):
+    glide_numbers = sorted(server.split_filter(record.glide_number).pop() for record in table.events if record.glide_number)
+    for keys in ({glide_numbers[0]}, set(glide_numbers[:5]), set(glide_numbers[:200])):
+        for start, end in BOUNDS:
+            expected = brute_force(table, start=start, end=end, glide_numbers=keys)
+            assert table.query(start=start, end=end, glide_numbers=keys) == expected
+            expected = brute_force(table, {"PHL"}, start=start, end=end, glide_numbers=keys)
+            assert table.query({"PHL"}, start=start, end=end, glide_numbers=keys) == expected
+    used.clear()
+    keys = set(glide_numbers[:server.SPARSE_RESULT_SIZE])
+    assert len(table.query(glide_numbers=keys)) == server.SPARSE_RESULT_SIZE
+    assert not used
+
+
+def test_undated_rows_only_without_bounds(table):
+    undated = [record for record in table.events if not server.event_ordinal(record)]
+    assert undated and table.undated == len(undated)
+    assert table.query()[:len(undated)] == undated
+    for start, end in BOUNDS[1:]:
+        assert all(server.event_ordinal(record) for record in table.query(start=start, end=end))
+
+
+def test_merged_replaces_by_url(table):
+    event = {"url": table.events[-1].url, "country_iso3": "NPL", "disaster_type": "Flood", "occurrence_date": "2016-06-01"}
+    merged = table.merged([event])
+    assert len(merged) == len(table)
+    assert merged.query({"NPL"}, {"FLOOD"}, START, END) == brute_force(merged, {"NPL"}, {"FLOOD"}, START, END)
+    assert event in [record.to_dict() for record in merged.query(start=START, end=END)]
+    assert table.merged([table.events[0].to_dict()]) is table